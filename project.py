@@ -1,45 +1,120 @@
 # Import library yang diperlukan
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-def load_data(json_data):
+# numba bersifat opsional; tanpa numba kernel streaming tetap jalan
+# sebagai fungsi Python biasa
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Nilai centroid hasil perhitungan sebelumnya, disimpan sebagai array
+# float64 agar langsung siap dipakai jalur broadcast NumPy
+CENTROIDS = np.array([424000.00, 915000.00, 689155580.85], dtype=np.float64)
+
+# Kolom yang ditampilkan pada sheet Detailed Results dan Mismatches
+REPORT_COLUMNS = ['Data id', 'Nama Toko', 'nama Produk', 'Omset',
+                  'Calculated Cluster', 'Existing Cluster']
+
+# Karakteristik umum tiap cluster, diindeks dengan nomor cluster - 1
+CLUSTER_CHARACTERISTICS = (
+    "Toko dengan penjualan rendah atau baru memulai",
+    "Toko dengan stabilitas penjualan menengah",
+    "Toko dengan performa penjualan tinggi",
+)
+
+def load_data(json_path):
     """
-    Fungsi untuk memuat dan membersihkan data dari JSON
+    Fungsi untuk memuat dan membersihkan data dari file JSON
     Args:
-        json_data: Data JSON yang akan diproses
+        json_path: Path file JSON yang akan diproses
     Returns:
         DataFrame pandas yang sudah dibersihkan
     """
-    df = pd.DataFrame(json_data)
-    # Membersihkan kolom Omset dengan menghapus koma dan mengkonversi ke float
-    df['Omset'] = df['Omset'].str.replace(',', '').astype(float)
+    # Baca JSON langsung ke bentuk kolumnar berbasis Arrow,
+    # tanpa list-of-dict perantara
+    df = pd.read_json(json_path, dtype_backend='pyarrow')
+    # Membersihkan kolom Omset: regex=False memakai jalur penggantian literal,
+    # to_numeric memakai parser C pandas
+    # float32 cukup untuk omset dan menghemat setengah bandwidth memori
+    df['Omset'] = pd.to_numeric(df['Omset'].str.replace(',', '', regex=False),
+                                errors='coerce').astype(np.float32)
+    # Nama produk banyak berulang; dtype category menyimpan kode integer
+    # sehingga groupby/value_counts bekerja pada int, bukan string
+    df['nama Produk'] = df['nama Produk'].astype('category')
     return df
 
-def calculate_distances(omset, centroids):
+def calculate_distances(omsets, centroids):
     """
-    Menghitung jarak antara omset dengan setiap centroid
+    Menghitung jarak absolut antara omset dengan setiap centroid
     Args:
-        omset: Nilai omset yang akan dihitung jaraknya
-        centroids: List nilai centroid
+        omsets: Nilai omset, skalar atau array N elemen
+        centroids: Array nilai centroid
     Returns:
-        List jarak ke setiap centroid
+        Matriks jarak N x K
     """
-    return [abs(omset - centroid) for centroid in centroids]
+    omsets = np.atleast_1d(np.asarray(omsets))
+    # Ikuti dtype omset supaya jalur float32 tidak ter-upcast ke float64
+    centroids = np.asarray(centroids, dtype=omsets.dtype)
+    return np.abs(omsets[:, None] - centroids[None, :])
 
 def assign_cluster(distances):
     """
     Menentukan cluster berdasarkan jarak terdekat
     Args:
-        distances: List jarak ke setiap centroid
+        distances: Matriks jarak N x K (atau satu baris jarak)
+    Returns:
+        Array nomor cluster (1-3)
+    """
+    return np.atleast_2d(distances).argmin(axis=1) + 1
+
+def _assign_cluster_single(omset, centroids):
+    """
+    Kernel skalar: menentukan cluster terdekat untuk satu nilai omset
+    Args:
+        omset: Satu nilai omset
+        centroids: Array float64 nilai centroid
     Returns:
         Nomor cluster (1-3)
     """
-    return distances.index(min(distances)) + 1
+    best = 0
+    best_distance = abs(omset - centroids[0])
+    for i in range(1, centroids.shape[0]):
+        distance = abs(omset - centroids[i])
+        if distance < best_distance:
+            best_distance = distance
+            best = i
+    return best + 1
+
+# Untuk pemrosesan streaming baris per baris: kompilasi JIT via numba
+# membuang overhead interpreter pada jalur skalar panas
+if njit is not None:
+    assign_cluster_streaming = njit('int64(float64, float64[:])',
+                                    cache=True)(_assign_cluster_single)
+else:
+    assign_cluster_streaming = _assign_cluster_single
+
+def _top_products(produk, n=3):
+    """
+    Mengambil n produk dengan jumlah kemunculan terbanyak dari satu grup
+    Args:
+        produk: Series kategorikal nama produk satu cluster
+        n: Banyaknya produk teratas yang diambil
+    Returns:
+        List nama produk, jumlah sama diurutkan sesuai kemunculan pertama
+    """
+    codes = produk.cat.codes.to_numpy()
+    uniq, first_seen, counts = np.unique(codes, return_index=True,
+                                         return_counts=True)
+    valid = uniq >= 0  # kode -1 menandakan nilai kosong
+    uniq, first_seen, counts = uniq[valid], first_seen[valid], counts[valid]
+    order = np.lexsort((first_seen, -counts))[:n]
+    return produk.cat.categories[uniq[order]].tolist()
 
 def analyze_cluster_characteristics(results_df):
     """
@@ -50,31 +125,24 @@ def analyze_cluster_characteristics(results_df):
         Dictionary berisi analisis per cluster
     """
     cluster_analysis = {}
-    
+
+    # Satu kali groupby menggantikan tiga kali filter penuh DataFrame
+    grouped = results_df.groupby('Calculated Cluster')
+    avg_omsets = grouped['Omset'].mean()
+    top_products_per_cluster = grouped['nama Produk'].apply(_top_products)
+
     for cluster in [1, 2, 3]:
-        # Filter data untuk cluster tertentu
-        cluster_data = results_df[results_df['Calculated Cluster'] == cluster]
-        
         # Hitung rata-rata omset
-        avg_omset = cluster_data['Omset'].mean()
-        
+        avg_omset = avg_omsets.get(cluster, np.nan)
+
         # Identifikasi produk dominan (3 teratas)
-        product_counts = Counter(cluster_data['nama Produk'])
-        top_products = product_counts.most_common(3)
-        
-        # Tentukan karakteristik berdasarkan cluster
-        if cluster == 1:
-            characteristics = "Toko dengan penjualan rendah atau baru memulai"
-        elif cluster == 2:
-            characteristics = "Toko dengan stabilitas penjualan menengah"
-        else:
-            characteristics = "Toko dengan performa penjualan tinggi"
-            
+        top_products = top_products_per_cluster.get(cluster, [])
+
         # Simpan hasil analisis
         cluster_analysis[cluster] = {
             'avg_omset': avg_omset,
-            'characteristics': characteristics,
-            'dominant_products': [prod[0] for prod in top_products]
+            'characteristics': CLUSTER_CHARACTERISTICS[cluster - 1],
+            'dominant_products': top_products
         }
     
     return cluster_analysis
@@ -92,7 +160,10 @@ def create_excel_report(results_df, centroids, cluster_analysis):
     # Buat file Excel dengan timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     excel_filename = f'clustering_analysis_{timestamp}.xlsx'
-    writer = pd.ExcelWriter(excel_filename, engine='xlsxwriter')
+    # constant_memory menulis baris secara streaming ke disk, jadi semua sel
+    # harus ditulis urut per baris dan format kolom diatur sebelum menulis
+    writer = pd.ExcelWriter(excel_filename, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True}})
     
     # Set format untuk Excel
     workbook = writer.book
@@ -108,27 +179,45 @@ def create_excel_report(results_df, centroids, cluster_analysis):
     text_format = workbook.add_format({
         'border': 1
     })
-    
+
+    # Siapkan buffer data tiap sheet di thread terpisah supaya komputasi
+    # pandas/NumPy (yang melepas GIL) tumpang-tindih dengan serialisasi
+    # XML xlsxwriter di thread utama
+    detailed_results = results_df[REPORT_COLUMNS]
+    match = (results_df['Calculated Cluster'].to_numpy()
+             == results_df['Existing Cluster'].to_numpy())
+
+    def _exist_counts():
+        exist_labels = results_df['Existing Cluster'].to_numpy(dtype=np.int64)
+        return np.bincount(exist_labels[exist_labels > 0], minlength=4)[1:4]
+
+    pool = ThreadPoolExecutor()
+    detailed_rows_future = pool.submit(detailed_results.to_numpy)
+    mismatch_rows_future = pool.submit(
+        lambda: detailed_results.loc[~match].to_numpy())
+    calc_counts_future = pool.submit(
+        lambda: np.bincount(results_df['Calculated Cluster']
+                            .to_numpy(dtype=np.int64), minlength=4)[1:4])
+    exist_counts_future = pool.submit(_exist_counts)
+
     # 1. Buat sheet Detail Results
-    detailed_results = results_df[['Data id', 'Nama Toko', 'nama Produk', 'Omset', 
-                                 'Calculated Cluster', 'Existing Cluster']]
-    detailed_results.to_excel(writer, sheet_name='Detailed Results', index=False)
-    
-    # Format sheet Detail Results
-    worksheet = writer.sheets['Detailed Results']
+    worksheet = workbook.add_worksheet('Detailed Results')
     worksheet.set_column('A:C', 20, text_format)
     worksheet.set_column('D:D', 15, number_format)
     worksheet.set_column('E:F', 12, text_format)
-    
-    for col_num, value in enumerate(detailed_results.columns.values):
-        worksheet.write(0, col_num, value, header_format)
+
+    worksheet.write_row(0, 0, REPORT_COLUMNS, header_format)
+    for row_num, row in enumerate(detailed_rows_future.result(), 1):
+        worksheet.write_row(row_num, 0, row)
     
     # 2. Buat sheet Summary Statistics
     summary_sheet = writer.book.add_worksheet('Summary Statistics')
-    
-    # Hitung distribusi cluster
-    calc_dist = results_df['Calculated Cluster'].value_counts().sort_index()
-    exist_dist = results_df['Existing Cluster'].value_counts().sort_index()
+    summary_sheet.set_column('A:A', 30)
+    summary_sheet.set_column('B:B', 50)
+
+    # Hitung distribusi cluster dari future yang sudah disiapkan
+    calc_counts = calc_counts_future.result()
+    exist_counts = exist_counts_future.result()
     
     # Siapkan data ringkasan
     summary_data = {
@@ -145,25 +234,28 @@ def create_excel_report(results_df, centroids, cluster_analysis):
         ],
         'Value': [
             len(results_df),
-            sum(results_df['Calculated Cluster'] == results_df['Existing Cluster']),
-            (sum(results_df['Calculated Cluster'] == results_df['Existing Cluster']) / len(results_df)) * 100,
-            calc_dist.get(1, 0),
-            calc_dist.get(2, 0),
-            calc_dist.get(3, 0),
-            exist_dist.get(1, 0),
-            exist_dist.get(2, 0),
-            exist_dist.get(3, 0),
+            int(match.sum()),
+            match.mean() * 100,
+            calc_counts[0],
+            calc_counts[1],
+            calc_counts[2],
+            exist_counts[0],
+            exist_counts[1],
+            exist_counts[2],
         ]
     }
     
-    # Tulis data ringkasan
+    # Tulis data ringkasan. write_column tidak bisa dipakai pada mode
+    # constant_memory (menulis per kolom berarti kembali ke baris yang sudah
+    # di-flush), jadi tetap per baris tetapi format nilai ditentukan sekali
+    # di muka tanpa cabang isinstance per sel
+    value_formats = [text_format] * len(summary_data['Value'])
+    value_formats[2] = number_format  # baris Match Percentage bernilai float
     summary_sheet.write('A1', 'Summary Statistics', header_format)
-    for i, (metric, value) in enumerate(zip(summary_data['Metric'], summary_data['Value'])):
+    for i, (metric, value, value_format) in enumerate(
+            zip(summary_data['Metric'], summary_data['Value'], value_formats)):
         summary_sheet.write(i + 1, 0, metric, text_format)
-        if isinstance(value, float):
-            summary_sheet.write(i + 1, 1, value, number_format)
-        else:
-            summary_sheet.write(i + 1, 1, value, text_format)
+        summary_sheet.write(i + 1, 1, value, value_format)
     
     # Tambahkan karakteristik cluster
     row_offset = len(summary_data['Metric']) + 2
@@ -181,84 +273,60 @@ def create_excel_report(results_df, centroids, cluster_analysis):
         summary_sheet.write(base_row + 1, 1, cluster_info['avg_omset'], number_format)
         summary_sheet.write(base_row + 2, 0, 'Dominant Products', text_format)
         summary_sheet.write(base_row + 2, 1, ', '.join(cluster_info['dominant_products']), text_format)
-    
-    summary_sheet.set_column('A:A', 30)
-    summary_sheet.set_column('B:B', 50)
-    
+
     # 3. Buat sheet Mismatches
-    mismatches = results_df[results_df['Calculated Cluster'] != results_df['Existing Cluster']]
-    mismatches = mismatches[['Data id', 'Nama Toko', 'nama Produk', 'Omset', 
-                            'Calculated Cluster', 'Existing Cluster']]
-    mismatches.to_excel(writer, sheet_name='Mismatches', index=False)
-    
-    # Format sheet Mismatches
-    worksheet = writer.sheets['Mismatches']
+    worksheet = workbook.add_worksheet('Mismatches')
     worksheet.set_column('A:C', 20, text_format)
     worksheet.set_column('D:D', 15, number_format)
     worksheet.set_column('E:F', 12, text_format)
-    
-    for col_num, value in enumerate(mismatches.columns.values):
-        worksheet.write(0, col_num, value, header_format)
+
+    worksheet.write_row(0, 0, REPORT_COLUMNS, header_format)
+    for row_num, row in enumerate(mismatch_rows_future.result(), 1):
+        worksheet.write_row(row_num, 0, row)
     
     # 4. Buat sheet Centroids
     centroid_sheet = writer.book.add_worksheet('Centroids')
-    centroid_sheet.write('A1', 'Cluster', header_format)
-    centroid_sheet.write('B1', 'Centroid Value', header_format)
-    
+    centroid_sheet.set_column('A:A', 15)
+    centroid_sheet.set_column('B:B', 20)
+    centroid_sheet.write_row(0, 0, ['Cluster', 'Centroid Value'], header_format)
+
     for i, centroid in enumerate(centroids, 1):
         centroid_sheet.write(i, 0, f'Cluster {i}', text_format)
         centroid_sheet.write(i, 1, centroid, number_format)
     
-    centroid_sheet.set_column('A:A', 15)
-    centroid_sheet.set_column('B:B', 20)
-    
     # Simpan file Excel
     writer.close()
+    pool.shutdown()
     return excel_filename
 
 def main():
     """
     Fungsi utama yang menjalankan seluruh proses analisis
     """
-    # Baca file JSON
-    with open('datasetnew.json', 'r') as file:
-        json_data = json.load(file)
-    
-    # Konversi ke DataFrame
-    df = load_data(json_data)
+    # Baca file JSON langsung ke DataFrame
+    df = load_data('datasetnew.json')
     
-    # Tentukan centroid
-    centroids = [424000.00, 915000.00, 689155580.85]
-    
-    # Proses clustering
-    results = []
-    for index, row in df.iterrows():
-        omset = row['Omset']
-        distances = calculate_distances(omset, centroids)
-        assigned_cluster = assign_cluster(distances)
-        
-        # Tentukan existing cluster
-        existing_cluster = None
-        if row['Kluster 1'] == '1':
-            existing_cluster = 1
-        elif row['Kluster 2'] == '1':
-            existing_cluster = 2
-        elif row['Kluster 3'] == '1':
-            existing_cluster = 3
-        
-        # Simpan hasil
-        results.append({
-            'Data id': row['Data id'],
-            'Nama Toko': row['Nama Toko'],
-            'nama Produk': row['nama Produk'],
-            'Omset': omset,
-            'Calculated Cluster': assigned_cluster,
-            'Existing Cluster': existing_cluster,
-            'Distances': distances
-        })
-    
-    # Konversi hasil ke DataFrame
-    results_df = pd.DataFrame(results)
+    # Proses clustering secara vektor: hitung matriks jarak N x K sekaligus
+    omsets = df['Omset'].to_numpy(dtype=np.float32)
+    distance_matrix = calculate_distances(omsets, CENTROIDS)
+    assigned_clusters = assign_cluster(distance_matrix).astype(np.int8)
+
+    # Tentukan existing cluster dari kolom Kluster 1-3 dalam satu perbandingan
+    kluster_mask = (df[['Kluster 1', 'Kluster 2', 'Kluster 3']] == '1') \
+        .to_numpy(dtype=bool, na_value=False)
+    existing_clusters = np.where(kluster_mask.any(axis=1),
+                                 kluster_mask.argmax(axis=1) + 1, -1).astype(np.int8)
+
+    # Rangkai hasil langsung sebagai dict-of-arrays (satu array per kolom),
+    # sehingga pandas tidak perlu mentransposisi list-of-dict per baris
+    results_df = pd.DataFrame({
+        'Data id': df['Data id'].to_numpy(),
+        'Nama Toko': df['Nama Toko'].to_numpy(),
+        'nama Produk': df['nama Produk'].values,
+        'Omset': omsets,
+        'Calculated Cluster': assigned_clusters,
+        'Existing Cluster': existing_clusters
+    })
     
     # Analisis karakteristik cluster
     cluster_analysis = analyze_cluster_characteristics(results_df)
@@ -272,7 +340,7 @@ def main():
         print(f"Produk dominan: {', '.join(info['dominant_products'])}")
     
     # Buat laporan Excel
-    excel_filename = create_excel_report(results_df, centroids, cluster_analysis)
+    excel_filename = create_excel_report(results_df, CENTROIDS, cluster_analysis)
     print(f"\nExcel report has been generated: {excel_filename}")
 
 # Jalankan program jika dieksekusi langsung